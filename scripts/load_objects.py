@@ -24,8 +24,12 @@ class LoadObjects:
         Returns:
             int: PyBullet object ID
         """
-        orientation = self.con.getQuaternionFromEuler(start_orientation)
         if radius is None:
+            # The default zero orientation is the identity quaternion, so only convert non-zero euler angles
+            if any(start_orientation):
+                orientation = self.con.getQuaternionFromEuler(start_orientation)
+            else:
+                orientation = (0.0, 0.0, 0.0, 1.0)
             objectId = self.con.loadURDF(urdf_name, start_pos, orientation, useFixedBase=fix_base)
         else:
             objectId = self.con.loadURDF(urdf_name, start_pos, globalScaling=radius, useFixedBase=fix_base)
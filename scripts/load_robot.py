@@ -5,6 +5,9 @@ from scipy.spatial.transform import Rotation as R
 from pybullet_planning import (rrt_connect, get_distance_fn, get_sample_fn, get_extend_fn, get_collision_fn)
 
 
+# Different colors for each Jacobian column
+JACOBIAN_COLORS = ((1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (1, 0, 1), (0, 1, 1))
+
 class LoadRobot:
     def __init__(self, con, robot_urdf_path: str, start_pos, start_orientation, home_config, collision_objects=None) -> None:
         """ Robot loader class
@@ -26,6 +29,8 @@ class LoadRobot:
         self.home_ee_pos = None
         self.home_ee_ori = None
         self.collision_objects = collision_objects
+        self.planning_fns = None
+        self.jacobian_line_ids = []
 
         self.setup_robot()
 
@@ -38,21 +43,27 @@ class LoadRobot:
         self.robotId = self.con.loadURDF(self.robot_urdf_path, self.start_pos, self.start_orientation, useFixedBase=True, flags=flags)
         self.num_joints = self.con.getNumJoints(self.robotId)
 
+        # Query each joint's info once and reuse it for the joint indices and limits
+        joint_infos = [self.con.getJointInfo(self.robotId, joint) for joint in range(self.num_joints)]
+
         self.end_effector_index = self.num_joints - 2
-        print(f'\nSelected end-effector index info: {self.con.getJointInfo(self.robotId, self.end_effector_index)[:2]}')
+        print(f'\nSelected end-effector index info: {joint_infos[self.end_effector_index][:2]}')
 
         self.controllable_joint_idx = [
-            self.con.getJointInfo(self.robotId, joint)[0]
-            for joint in range(self.num_joints)
-            if self.con.getJointInfo(self.robotId, joint)[2] in {self.con.JOINT_REVOLUTE, self.con.JOINT_PRISMATIC}
+            info[0]
+            for info in joint_infos
+            if info[2] in {self.con.JOINT_REVOLUTE, self.con.JOINT_PRISMATIC}
         ]
 
         # Extract joint limits from urdf
-        self.joint_limits = [self.con.getJointInfo(self.robotId, i)[8:10] for i in self.controllable_joint_idx]
+        self.joint_limits = [joint_infos[i][8:10] for i in self.controllable_joint_idx]
         self.lower_limits = [t[0] for t in self.joint_limits]
         self.upper_limits = [t[1] for t in self.joint_limits]
         self.joint_ranges = [upper - lower for lower, upper in zip(self.lower_limits, self.upper_limits)]
 
+        # Zero joint velocities and accelerations for the Jacobian calculation
+        self.zero_joint_vec = [0.0] * len(self.controllable_joint_idx)
+
         # Set the home position
         self.reset_joint_positions(self.home_config)
 
@@ -91,26 +102,59 @@ class LoadRobot:
         # Return collision bool
         return self.con.getContactPoints(bodyA=self.robotId, bodyB=self.robotId)
     
+    def reach_bound(self):
+        """ Conservative bound on the end-effector reach. Revolute and fixed joints keep the distance between their parent
+        and child link frames constant, so the sum of those distances along the chain bounds how far the end-effector can
+        get from the root of the chain. Each prismatic joint can add at most its travel to that sum.
+
+        Returns:
+            origin (np.array): position of the link frame at the root of the end-effector chain
+            max_reach (float): bound on the end-effector distance from origin, inf if a joint in the chain is unbounded
+        """
+        chain_pos = [self.con.getLinkState(self.robotId, self.end_effector_index, computeForwardKinematics=True)[4]]
+        max_reach = 0.0
+
+        # Walk from the end-effector up to the base
+        link = self.end_effector_index
+        while True:
+            joint_info = self.con.getJointInfo(self.robotId, link)
+            if joint_info[2] == self.con.JOINT_PRISMATIC:
+                lower, upper = joint_info[8:10]
+                if upper < lower:
+                    # The joint has no limits
+                    return np.array(chain_pos[-1]), np.inf
+                max_reach += upper - lower
+            elif joint_info[2] not in {self.con.JOINT_REVOLUTE, self.con.JOINT_FIXED}:
+                return np.array(chain_pos[-1]), np.inf
+
+            link = joint_info[16]
+            if link == -1:
+                break
+            chain_pos.append(self.con.getLinkState(self.robotId, link, computeForwardKinematics=True)[4])
+
+        chain_pos = np.array(chain_pos)
+        max_reach += np.linalg.norm(np.diff(chain_pos, axis=0), axis=1).sum()
+        return chain_pos[-1], max_reach
+
     def check_collision_aabb(self, robot_id, plane_id):
         # Get AABB for the plane (ground)
-        plane_aabb = self.con.getAABB(plane_id)
-
-        # Iterate over each link of the robot
-        for i in self.controllable_joint_idx:
-            link_aabb = self.con.getAABB(robot_id, i)
-            
-            # Check for overlap between AABBs
-            if (link_aabb[1][0] >= plane_aabb[0][0] and link_aabb[0][0] <= plane_aabb[1][0] and
-                link_aabb[1][1] >= plane_aabb[0][1] and link_aabb[0][1] <= plane_aabb[1][1] and
-                link_aabb[1][2] >= plane_aabb[0][2] and link_aabb[0][2] <= plane_aabb[1][2]):
-                return True
-
-        return False
+        plane_aabb_min, plane_aabb_max = np.array(self.con.getAABB(plane_id))
+
+        # Gather the AABB of each robot link into a single (num_links, 2, 3) array
+        link_aabbs = np.array([self.con.getAABB(robot_id, i) for i in self.controllable_joint_idx])
+
+        # Check for overlap between every link AABB and the plane AABB at once
+        overlap = np.all((link_aabbs[:, 1] >= plane_aabb_min) & (link_aabbs[:, 0] <= plane_aabb_max), axis=1)
+
+        return bool(np.any(overlap))
     
-    def inverse_kinematics(self, position, orientation=None, pos_tol=1e-4, rest_config=None):
+    def inverse_kinematics(self, position, orientation=None, pos_tol=1e-4, rest_config=None, current_config=None):
         if rest_config is None:
             rest_config = self.home_config
 
+        # Seed the solver from the given configuration instead of the robot's current joint state
+        seed = {} if current_config is None else {'currentPositions': list(current_config)}
+
         if orientation is not None:
             joint_positions = self.con.calculateInverseKinematics(
                 self.robotId, 
@@ -121,7 +165,8 @@ class LoadRobot:
                 upperLimits=self.upper_limits,
                 jointRanges=self.joint_ranges,
                 restPoses=rest_config,
-                residualThreshold=pos_tol
+                residualThreshold=pos_tol,
+                **seed
                 )
         else:
             joint_positions = self.con.calculateInverseKinematics(
@@ -132,10 +177,63 @@ class LoadRobot:
                 upperLimits=self.upper_limits,
                 jointRanges=self.joint_ranges,
                 restPoses=rest_config,
-                residualThreshold=pos_tol
+                residualThreshold=pos_tol,
+                **seed
                 )
         return joint_positions
     
+    def inverse_kinematics_path(self, positions, orientations, start_config, pos_tol=1e-4):
+        """ Solves the inverse kinematics for a sequence of end-effector poses along a path. Each solve is seeded with
+        the previous solution and unwrapped to the shortest angular distance from it, keeping the path continuous.
+
+        Args:
+            positions (np.array): end-effector positions along the path, shape (N, 3)
+            orientations (np.array): end-effector orientations along the path as quaternions, shape (N, 4)
+            start_config (np.array): joint configuration preceding the first pose
+            pos_tol (float, optional): IK residual threshold. Defaults to 1e-4.
+
+        Returns:
+            joint_configs (np.array): joint configurations for each pose, shape (N, num_joints)
+        """
+        joint_configs = np.empty((len(positions), len(start_config)))
+        prev_config = np.asarray(start_config, dtype=float)
+
+        for i, (position, orientation) in enumerate(zip(positions, orientations)):
+            joint_config = self.inverse_kinematics(position, orientation, pos_tol=pos_tol, rest_config=list(prev_config))
+            joint_configs[i] = self.shortest_angular_distance(prev_config, joint_config)
+            prev_config = joint_configs[i]
+
+        return joint_configs
+
+    def batch_inverse_kinematics(self, positions, orientations=None, pos_tol=1e-4, rest_config=None, warm_start=False):
+        """ Solves the inverse kinematics of many independent end-effector poses
+
+        Args:
+            positions (np.array): end-effector positions, shape (N, 3)
+            orientations (np.array, optional): end-effector orientations as quaternions, shape (N, 4). Defaults to None.
+            pos_tol (float, optional): IK residual threshold. Defaults to 1e-4.
+            rest_config (list, optional): rest pose shared by every solve. Defaults to the home configuration.
+            warm_start (bool, optional): seed each solve with the previous solution, starting from the rest pose. Only
+                helps when consecutive poses are close to each other. Defaults to False.
+
+        Returns:
+            joint_configs (np.array): joint configuration for each pose, shape (N, num_joints)
+        """
+        if orientations is None:
+            orientations = [None] * len(positions)
+
+        current_config = None
+        if warm_start:
+            current_config = self.home_config if rest_config is None else rest_config
+
+        joint_configs = np.empty((len(positions), len(self.controllable_joint_idx)))
+        for i, (position, orientation) in enumerate(zip(positions, orientations)):
+            joint_configs[i] = self.inverse_kinematics(position, orientation, pos_tol=pos_tol, rest_config=rest_config, current_config=current_config)
+            if warm_start:
+                current_config = joint_configs[i]
+
+        return joint_configs
+
     def minimize_angle_change(self, start_angle, end_angle):
         """
         Finds the shortest path between start_angle and end_angle, considering
@@ -164,32 +262,12 @@ class LoadRobot:
         Returns:
         - adjusted_end_configuration: numpy array of end joint angles modified to take the shortest angular distance to the start configuration
         """
-        # Ensure inputs are numpy arrays for vectorized operations
-        start_configuration = np.array(start_configuration)
-        end_configuration = np.array(end_configuration)
-
         # Normalize both configurations to [-pi, pi]
-        start_configuration = (start_configuration + np.pi) % (2 * np.pi) - np.pi
-        end_configuration = (end_configuration + np.pi) % (2 * np.pi) - np.pi
-
-        # Calculate the angular difference between start and end configurations
-        angular_difference = end_configuration - start_configuration
-
-        # Wrap the angular difference to be within [-pi, pi]
-        adjusted_difference = (angular_difference + np.pi) % (2 * np.pi) - np.pi
-
-        # Check both paths: (end - start) and (end - start - 2*pi)
-        adjusted_end_minus_2pi = end_configuration - 2 * np.pi
-        adjusted_end_plus_2pi = end_configuration + 2 * np.pi
-
-        # Compute all possible angular differences
-        diff_original = adjusted_difference
-        diff_minus_2pi = (adjusted_end_minus_2pi - start_configuration + np.pi) % (2 * np.pi) - np.pi
-        diff_plus_2pi = (adjusted_end_plus_2pi - start_configuration + np.pi) % (2 * np.pi) - np.pi
+        start_configuration = (np.asarray(start_configuration, dtype=float) + np.pi) % (2 * np.pi) - np.pi
+        end_configuration = (np.asarray(end_configuration, dtype=float) + np.pi) % (2 * np.pi) - np.pi
 
-        # Choose the smallest angular difference for each joint
-        shortest_difference = np.where(np.abs(diff_minus_2pi) < np.abs(diff_original), diff_minus_2pi, diff_original)
-        shortest_difference = np.where(np.abs(diff_plus_2pi) < np.abs(shortest_difference), diff_plus_2pi, shortest_difference)
+        # Wrapping the difference to [-pi, pi] already selects the shorter of the (end - start) and (end - start -+ 2pi) paths
+        shortest_difference = (end_configuration - start_configuration + np.pi) % (2 * np.pi) - np.pi
 
         # Adjust the end configuration based on the shortest angular difference
         adjusted_end_configuration = start_configuration + shortest_difference
@@ -209,26 +287,18 @@ class LoadRobot:
         - interpolated_configs: numpy array of shape (num_steps, n), interpolated joint positions
         """
         
-        start_config = np.array(start_config)
-        end_config = np.array(end_config)
+        start_config = np.asarray(start_config, dtype=float)
+        end_config = np.array(end_config, dtype=float)
 
         # Minimize angular rotation of the last two joints
         end_config[4:] = self.shortest_angular_distance(start_config[4:], end_config[4:])
 
-        # Create an array for the interpolated configurations
-        interpolated_configs = np.zeros((num_steps, len(start_config)))
+        # Interpolate every joint linearly in one broadcast between the start and adjusted end angles
+        alpha = np.linspace(0, 1, num_steps)[:, np.newaxis]
+        interpolated_configs = (1 - alpha) * start_config + alpha * end_config
 
-        # Loop over each joint to interpolate using minimal angular changes
-        for j in range(len(start_config)):
-            # Interpolate linearly between the start and adjusted end angles
-            for i in range(num_steps):
-                interpolated_value = np.linspace(start_config[j], end_config[j], num_steps)[i]
-                
-                # Ensure the joint value stays within [-2pi, 2pi] after interpolation
-                interpolated_value = np.clip(interpolated_value, self.lower_limits[j], self.upper_limits[j])
-                
-                # Store the interpolated value in the array
-                interpolated_configs[i, j] = interpolated_value
+        # Ensure the joint values stay within the joint limits after interpolation
+        np.clip(interpolated_configs, self.lower_limits, self.upper_limits, out=interpolated_configs)
 
         # Check for collisions in the interpolated path
         collision_in_path = any(self.check_self_collision(config) for config in interpolated_configs)
@@ -248,8 +318,8 @@ class LoadRobot:
         - interpolated_configs: numpy array of shape (num_steps, n), interpolated joint positions
         """
         
-        start_config = np.array(start_config)
-        end_config = np.array(end_config)
+        start_config = np.asarray(start_config, dtype=float)
+        end_config = np.array(end_config, dtype=float)
 
         # Minimize angular rotation of the last two joints
         end_config[4:] = self.shortest_angular_distance(start_config[4:], end_config[4:])
@@ -261,22 +331,15 @@ class LoadRobot:
         first_joint_steps = int(num_steps * 0.3)
         
         # Interpolation for the first joint
-        for i in range(first_joint_steps):
-            interpolated_value = np.linspace(start_config[0], end_config[0], first_joint_steps)[i]
-            interpolated_value = np.clip(interpolated_value, self.lower_limits[0], self.upper_limits[0])
-            interpolated_configs[i, 0] = interpolated_value
+        first_joint_values = np.linspace(start_config[0], end_config[0], first_joint_steps)
+        interpolated_configs[:first_joint_steps, 0] = np.clip(first_joint_values, self.lower_limits[0], self.upper_limits[0])
 
         # Set remaining positions for the other joints
-        for j in range(1, len(start_config)):
-            # Interpolate linearly between the start and adjusted end angles for other joints
-            for i in range(num_steps - first_joint_steps):
-                interpolated_value = np.linspace(start_config[j], end_config[j], num_steps)[i]
-                interpolated_value = np.clip(interpolated_value, self.lower_limits[j], self.upper_limits[j])
-                interpolated_configs[i + first_joint_steps, j] = interpolated_value
+        other_joint_values = np.linspace(start_config[1:], end_config[1:], num_steps)[:num_steps - first_joint_steps]
+        interpolated_configs[first_joint_steps:, 1:] = np.clip(other_joint_values, self.lower_limits[1:], self.upper_limits[1:])
 
         # Ensure the first positions of other joints remain the same
-        for i in range(first_joint_steps):
-            interpolated_configs[i, 1:] = start_config[1:]
+        interpolated_configs[:first_joint_steps, 1:] = start_config[1:]
 
         interpolated_configs[first_joint_steps:, 0] = interpolated_configs[first_joint_steps - 1, 0]
 
@@ -356,6 +419,9 @@ class LoadRobot:
             traj (np.array): joint trajectory
             collision (bool): describes any collisions in the trajectory
         """
+        # Every segment needs at least one step, each segment starts from the last configuration of the previous one
+        assert num_steps >= 6, "peck_traj_gen2 needs at least 6 steps"
+
         start_position = start_pose[:3]
         start_orientation = start_pose[3:]
 
@@ -378,33 +444,29 @@ class LoadRobot:
         # Create SLERP object with two rotations
         slerp = Slerp(times, rotations)
 
-        # Interpolate at t = 0.5 (midpoint)
-        mid_rotation0 = slerp(0.25)
-        mid_rotation1 = slerp(0.5)
-        mid_rotation2 = slerp(0.75)
+        # Interpolate the orientations at each midpoint
+        mid_orientations = slerp(np.linspace(0, 1, num_midpoints + 2)[1:-1]).as_quat()
 
-        # Get the quaternion for the mid rotation
-        mid_orientation0 = mid_rotation0.as_quat()
-        mid_orientation1 = mid_rotation1.as_quat()
-        mid_orientation2 = mid_rotation2.as_quat()
-
-        mid_config0 = self.inverse_kinematics(mid_positions[1], mid_orientation0, rest_config=list(start_config))
-        first_traj, path_collision0 = self.interpolate_joint_trajectory(start_config, mid_config0, int(num_steps/6))
+        # Each segment passes through a midpoint, the last one ends at end_config
+        segment_steps = [int(num_steps/6)] * num_midpoints + [int(num_steps/2)]
+        segment_bounds = np.cumsum([0] + segment_steps)
 
-        mid_config1 = self.inverse_kinematics(mid_positions[2], mid_orientation1, rest_config=list(first_traj[-1]))
-        second_traj, path_collision1 = self.interpolate_joint_trajectory(first_traj[-1], mid_config1, int(num_steps/6))
+        # Write each segment straight into the preallocated trajectory rather than stacking them afterwards
+        traj = np.empty((segment_bounds[-1], len(start_config)))
+        collision = False
+        segment_start_config = start_config
 
-        mid_config2 = self.inverse_kinematics(mid_positions[3], mid_orientation2, rest_config=list(second_traj[-1]))
-        third_traj, path_collision2 = self.interpolate_joint_trajectory(second_traj[-1], mid_config2, int(num_steps/6))
+        for i in range(num_midpoints + 1):
+            if i < num_midpoints:
+                segment_end_config = self.inverse_kinematics(mid_positions[i + 1], mid_orientations[i], rest_config=list(segment_start_config))
+            else:
+                segment_end_config = end_config
 
-        fourth_traj, path_collision3 = self.interpolate_joint_trajectory(third_traj[-1], end_config, int(num_steps/2))
+            segment = slice(segment_bounds[i], segment_bounds[i + 1])
+            traj[segment], path_collision = self.interpolate_joint_trajectory(segment_start_config, segment_end_config, segment_steps[i])
+            collision = collision or path_collision
 
-        traj = np.vstack((first_traj, second_traj, third_traj, fourth_traj))
-
-        if path_collision0 or path_collision1 or path_collision2 or path_collision3:
-            collision = True
-        else:
-            collision = False
+            segment_start_config = traj[segment_bounds[i + 1] - 1]
 
         return traj, collision
     
@@ -441,57 +503,25 @@ class LoadRobot:
         num_steps_phase1 = num_steps // 2  # First half for x and z translation
         num_steps_phase2 = num_steps - num_steps_phase1  # Second half for y translation
 
-        # Create an empty array for storing interpolated joint configurations
-        interpolated_configs = np.zeros((num_steps, len(start_config)))
-        interpolated_configs[0] = start_config
-
         # Phase 1: Interpolate x and z first, keep y constant
-        for i in range(1, num_steps_phase1):
-            # Interpolate x and z linearly between the start and end pose
-            interp_x = np.linspace(start_position[0], end_position[0], num_steps_phase1)[i]
-            interp_z = np.linspace(start_position[2], end_position[2], num_steps_phase1)[i]
+        positions = np.empty((num_steps, 3))
+        positions[:num_steps_phase1] = np.linspace(start_position, end_position, num_steps_phase1)
+        positions[:num_steps_phase1, 1] = start_position[1]
 
-            # Keep y constant as the start y value
-            interp_y = start_position[1]
-
-            intermediate_position = np.array([interp_x, interp_y, interp_z])
-
-            # Interpolate orientation using SLERP
-            t = i / num_steps_phase1
-            intermediate_orientation = slerp(t).as_quat()  # Get interpolated orientation
-
-            # Create intermediate pose (x, y, z) + maintain original orientation
-            intermediate_pose = np.concatenate((intermediate_position, intermediate_orientation))
+        # Phase 2: Interpolate y while keeping x and z fixed at their final values
+        positions[num_steps_phase1:] = end_position
+        positions[num_steps_phase1:, 1] = np.linspace(start_position[1], end_position[1], num_steps_phase2)
 
-            # Compute joint configuration for this pose using inverse kinematics
-            joint_config = self.inverse_kinematics(intermediate_position, intermediate_orientation, rest_config=list(interpolated_configs[i-1]))
-            joint_config = self.shortest_angular_distance(interpolated_configs[i-1], joint_config)
+        # Interpolate all orientations with a single SLERP evaluation
+        slerp_times = np.concatenate((np.arange(num_steps_phase1) / num_steps_phase1,
+                                      0.5 + 0.5 * np.arange(num_steps_phase2) / num_steps_phase2))
+        orientations = slerp(slerp_times).as_quat()
 
-            interpolated_configs[i] = joint_config
+        # Solve the intermediate poses, the endpoints are fixed by the start and end configurations
+        interpolated_configs = np.zeros((num_steps, len(start_config)))
+        interpolated_configs[0] = start_config
+        interpolated_configs[1:-1] = self.inverse_kinematics_path(positions[1:-1], orientations[1:-1], start_config)
 
-        # Phase 2: Interpolate y while keeping x and z fixed at their final values
-        for i in range(num_steps_phase2):
-            # Interpolate y linearly between the intermediate y and end y
-            interp_y = np.linspace(start_position[1], end_position[1], num_steps_phase2)[i]
-
-            # Keep x and z fixed at their final values
-            interp_x = end_position[0]
-            interp_z = end_position[2]
-
-            # Create final pose (x, y, z) + final orientation
-            final_position = np.array([interp_x, interp_y, interp_z])
-            
-            # Interpolate orientation using SLERP
-            t = i / num_steps_phase2
-            intermediate_orientation = slerp(0.5 + 0.5 * t).as_quat()  # Interpolate for second phase
-
-            intermediate_pose = np.concatenate((final_position, intermediate_orientation))
-
-            # Compute joint configuration for this pose using inverse kinematics
-            joint_config = self.inverse_kinematics(final_position, intermediate_orientation, rest_config=list(interpolated_configs[i-1]))
-            joint_config = self.shortest_angular_distance(interpolated_configs[i-1], joint_config)
-            interpolated_configs[num_steps_phase1 + i] = joint_config
-        
         # Force the last configuration to match end_config
         interpolated_configs[-1] = end_config
         interpolated_configs[-1] = self.shortest_angular_distance(interpolated_configs[-2], end_config)
@@ -511,36 +541,52 @@ class LoadRobot:
         Returns:
             float list: joint trajectory of desired length
         """
-        path = np.array(path)
+        path = np.asarray(path, dtype=float)
         current_path_len = path.shape[0] # Number of rows
-        num_joints = path.shape[1] # Numer of columns
 
         # Generate new indices for interpolation
         new_indices = np.linspace(0, current_path_len - 1, desired_length)
 
-        # Interpolate each column separately
-        return np.array([np.interp(new_indices, np.arange(current_path_len), path[:, i]) for i in range(num_joints)]).T
+        # The source samples are evenly spaced, so each new index splits into a lower row and a blend fraction
+        lower_idx = np.floor(new_indices).astype(int)
+        upper_idx = np.minimum(lower_idx + 1, current_path_len - 1)
+        frac = (new_indices - lower_idx)[:, np.newaxis]
+
+        # Interpolate all columns at once
+        return (1 - frac) * path[lower_idx] + frac * path[upper_idx]
+
+    def vector_field_sample_fn(self, goal_position, alpha=0.8, batch_size=1024):
+        random_confs = []
 
-    def vector_field_sample_fn(self, goal_position, alpha=0.8):
         def sample():
-            random_conf = np.random.uniform([limit[0] for limit in self.joint_limits], 
-                                            [limit[1] for limit in self.joint_limits])
-            self.set_joint_positions(random_conf)
-            end_effector_position, _ = self.get_link_state(self.end_effector_index)
-            
-            vector_to_goal = np.array(goal_position) - end_effector_position
-            guided_position = end_effector_position + vector_to_goal
-            # guided_conf = np.array(self.robot.inverse_kinematics(guided_position, goal_orientation))
-            guided_conf = np.array(self.inverse_kinematics(guided_position))
-            final_conf = (1 - alpha) * random_conf + alpha * guided_conf
-            
-            return final_conf
+            if not random_confs:
+                # Draw a batch of random configurations at once, then hand them out one per call
+                random_confs.extend(np.random.uniform(self.lower_limits, self.upper_limits, size=(batch_size, len(self.lower_limits))))
+            random_conf = random_confs.pop()
+
+            # The IK solve starts from the robot's current joint state, which the collision checks keep resetting, so the
+            # guided configuration is solved again for every sample
+            guided_conf = np.array(self.inverse_kinematics(goal_position))
+            return (1 - alpha) * random_conf + alpha * guided_conf
         return sample
 
+    def get_planning_fns(self):
+        """ Build the RRT extend, collision and distance functions once and reuse them across plans. The robot and its
+        collision objects are static, so the self-collision link pairs and obstacle list never need to be rebuilt.
+
+        Returns:
+            tuple: extend_fn, collision_fn, distance_fn
+        """
+        if self.planning_fns is None:
+            self.planning_fns = (
+                get_extend_fn(self.robotId, self.controllable_joint_idx),
+                get_collision_fn(self.robotId, self.controllable_joint_idx, self.collision_objects),
+                get_distance_fn(self.robotId, self.controllable_joint_idx)
+            )
+        return self.planning_fns
+
     def rrt_path(self, start_positions, end_positions, target_pos=None, steps=100, rrt_iter=500):
-        extend_fn = get_extend_fn(self.robotId, self.controllable_joint_idx)
-        collision_fn = get_collision_fn(self.robotId, self.controllable_joint_idx, self.collision_objects)
-        distance_fn = get_distance_fn(self.robotId, self.controllable_joint_idx)
+        extend_fn, collision_fn, distance_fn = self.get_planning_fns()
         # sample_fn = get_sample_fn(self.robotId, self.controllable_joint_idx)
         sample_fn = self.vector_field_sample_fn(target_pos)
 
@@ -560,40 +606,71 @@ class LoadRobot:
         return path
 
     def quaternion_angle_difference(self, q1, q2):
-        # Compute the quaternion representing the relative rotation
-        q1_conjugate = q1 * np.array([1, -1, -1, -1])  # Conjugate of q1
-        q_relative = self.con.multiplyTransforms([0, 0, 0], q1_conjugate, [0, 0, 0], q2)[1]
-        # The angle of rotation (in radians) is given by the arccos of the w component of the relative quaternion
-        angle = 2 * np.arccos(np.clip(q_relative[0], -1.0, 1.0))
+        # The angle of the relative rotation follows from the quaternion inner product, |q1 . q2| = cos(angle / 2),
+        # which is independent of the (x, y, z, w) vs (w, x, y, z) ordering and of the q vs -q sign ambiguity
+        dot = np.abs(np.dot(q1, q2))
+        angle = 2 * np.arccos(min(dot, 1.0))
         return angle
     
     def check_pose_within_tolerance(self, final_position, final_orientation, target_position, target_orientation, pos_tolerance, ori_tolerance):
-        pos_diff = np.linalg.norm(np.array(final_position) - np.array(target_position))
-        ori_diff = np.pi - self.quaternion_angle_difference(np.array(target_orientation), np.array(final_orientation))
-        return pos_diff <= pos_tolerance and np.abs(ori_diff) <= ori_tolerance
+        pos_diff = np.linalg.norm(np.subtract(final_position, target_position))
+        ori_diff = self.quaternion_angle_difference(np.asarray(target_orientation), np.asarray(final_orientation))
+        return pos_diff <= pos_tolerance and ori_diff <= ori_tolerance
     
     def jacobian_viz(self, jacobian, end_effector_pos):
         # Visualization of the Jacobian columns
         num_columns = jacobian.shape[1]
-        colors = [(1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0), (1, 0, 1), (0, 1, 1)]  # Different colors for each column
+        if len(self.jacobian_line_ids) != num_columns:
+            self.jacobian_line_ids = [-1] * num_columns
+
         for i in range(num_columns):
             vector = jacobian[:, i]
             start_point = end_effector_pos
             end_point = start_point + 0.3 * vector[:3]  # Scale the vector for better visualization
-            self.con.addUserDebugLine(start_point, end_point, colors[i % len(colors)], 2)
 
-    def calculate_manipulability(self, joint_positions, planar=True, visualize_jacobian=False):
-        zero_vec = [0.0] * len(joint_positions)
-        jac_t, jac_r = self.con.calculateJacobian(self.robotId, self.end_effector_index, [0, 0, 0], joint_positions, zero_vec, zero_vec)
-        jacobian = np.vstack((jac_t, jac_r))
-        
+            # Update the line drawn for this column on the previous call instead of adding a new one
+            self.jacobian_line_ids[i] = self.con.addUserDebugLine(start_point, end_point, JACOBIAN_COLORS[i % len(JACOBIAN_COLORS)], 2,
+                                                                  replaceItemUniqueId=self.jacobian_line_ids[i])
+
+    def calculate_jacobian(self, joint_positions, planar=True):
+        jac_t, jac_r = self.con.calculateJacobian(self.robotId, self.end_effector_index, [0, 0, 0], list(joint_positions), self.zero_joint_vec, self.zero_joint_vec)
+
         if planar:
-            jac_t = np.array(jac_t)[1:3]
-            jac_r = np.array(jac_r)[0]
-            jacobian = np.vstack((jac_t, jac_r))
+            # Only the y and z translation rows and the x rotation row span the planar workspace
+            return np.array((jac_t[1], jac_t[2], jac_r[0]))
+        return np.array(jac_t + jac_r)
+
+    def calculate_manipulability(self, joint_positions, planar=True, visualize_jacobian=False):
+        jacobian = self.calculate_jacobian(joint_positions, planar=planar)
 
         if visualize_jacobian:
             end_effector_pos, _ = self.get_link_state(self.end_effector_index)
             self.jacobian_viz(jacobian, end_effector_pos)
 
-        return np.sqrt(np.linalg.det(jacobian @ jacobian.T))
\ No newline at end of file
+        # J @ J.T is positive semi-definite, clamp round-off at singular configurations so they score 0 rather than nan
+        return np.sqrt(max(np.linalg.det(jacobian @ jacobian.T), 0.0))
+
+    def batch_manipulability(self, joint_configs, planar=True):
+        """ Calculates the manipulability of many joint configurations, evaluating every det(J @ J.T) in one batched call
+
+        Args:
+            joint_configs (np.array): joint configurations, shape (N, num_joints)
+            planar (bool, optional): use the planar Jacobian rows. Defaults to True.
+
+        Returns:
+            np.array: manipulability of each configuration, shape (N,)
+        """
+        # Convert all configurations to python floats at once, PyBullet requires sequences of floats rather than ndarray rows
+        joint_configs = np.asarray(joint_configs, dtype=float).tolist()
+
+        # Fill a preallocated Jacobian stack in place rather than stacking a list of per-sample arrays
+        jacobians = np.empty((len(joint_configs), 3 if planar else 6, len(self.controllable_joint_idx)))
+        for i, joint_config in enumerate(joint_configs):
+            jac_t, jac_r = self.con.calculateJacobian(self.robotId, self.end_effector_index, [0, 0, 0], joint_config, self.zero_joint_vec, self.zero_joint_vec)
+            if planar:
+                jacobians[i] = (jac_t[1], jac_t[2], jac_r[0])
+            else:
+                jacobians[i, :3] = jac_t
+                jacobians[i, 3:] = jac_r
+
+        return np.sqrt(np.clip(np.linalg.det(jacobians @ jacobians.transpose(0, 2, 1)), 0.0, None))
@@ -17,7 +17,8 @@ class PathCache:
         self.object_loader = LoadObjects(self.pyb.con)
 
         self.robot_home_pos = robot_home_pos
-        self.robot = LoadRobot(self.pyb.con, robot_urdf_path, [0, 0, 0], self.pyb.con.getQuaternionFromEuler([0, 0, 0]), self.robot_home_pos, collision_objects=self.object_loader.collision_objects)
+        self.robot_home_config = np.asarray(robot_home_pos, dtype=float)  # Cached once for the per-target trajectory interpolation
+        self.robot = LoadRobot(self.pyb.con, robot_urdf_path, [0, 0, 0], (0.0, 0.0, 0.0, 1.0), self.robot_home_pos, collision_objects=self.object_loader.collision_objects)
         
         start_position, start_orientation = self.robot.get_link_state(self.robot.end_effector_index)
         self.start_pose = np.concatenate((start_position, start_orientation))
@@ -43,7 +44,7 @@ class PathCache:
         best_ee_positions = np.zeros((num_points, 3))
         best_orienations = np.zeros((num_points, 4))
         best_manipulabilities = np.zeros((num_points, 1))
-        best_paths = np.zeros((num_configs_in_path, len(self.robot.controllable_joint_idx), num_points))
+        best_paths = np.zeros((num_configs_in_path, len(self.robot.controllable_joint_idx), num_points), dtype=np.float32)  # float32 halves the saved path cache
 
         nan_mask = None
         increment = 0.05  # 5% print increment
@@ -67,8 +68,7 @@ class PathCache:
                 joint_angles = self.robot.inverse_kinematics(target_position, target_orientation)
 
                 self.robot.reset_joint_positions(joint_angles)
-                ee_pos, ee_ori = self.robot.get_link_state(self.robot.end_effector_index)
-                ee_pose = np.concatenate((ee_pos, ee_ori))
+                ee_pos, _ = self.robot.get_link_state(self.robot.end_effector_index)
 
                 # If the target joint angles result in a collision with the ground plane, skip the iteration
                 ground_collision = self.robot.check_collision_aabb(self.robot.robotId, self.object_loader.planeId)
@@ -81,7 +81,7 @@ class PathCache:
                     continue
 
                 # Interpolate a joint trajectory between the robot home position and the desired target configuration
-                path, collision_in_path = self.robot.interpolate_joint_trajectory(robot_home_pos, joint_angles, num_steps=num_configs_in_path)
+                path, collision_in_path = self.robot.interpolate_joint_trajectory(self.robot_home_config, joint_angles, num_steps=num_configs_in_path)
                 if collision_in_path:
                     continue
 
@@ -12,7 +12,7 @@ class PrunerEnv:
     def __init__(self, robot_urdf_path: str, planar: bool, renders=True):
         self.pyb = PybUtils(self, renders=renders)
         self.object_loader = LoadObjects(self.pyb.con)
-        self.robot = LoadRobot(self.pyb.con, robot_urdf_path, [self.object_loader.start_x, 0, 0], self.pyb.con.getQuaternionFromEuler([0, 0, 0]))
+        self.robot = LoadRobot(self.pyb.con, robot_urdf_path, [self.object_loader.start_x, 0, 0], (0.0, 0.0, 0.0, 1.0))
         
     def simple_controller(self, target_joint_positions, position_tol=0.1, planar=True):
         # Iterate over the joints and set their positions
@@ -40,15 +40,11 @@ class PrunerEnv:
 
     def vector_field_sample_fn(self, goal_position, goal_orientation, alpha=0.8):
         def sample():
-            random_conf = np.random.uniform([limit[0] for limit in self.joint_limits], 
-                                            [limit[1] for limit in self.joint_limits])
-            self.robot.set_joint_positions(random_conf)
-            end_effector_position, _ = self.robot.get_link_state(self.robot.end_effector_index)
-            
-            vector_to_goal = np.array(goal_position) - end_effector_position
-            guided_position = end_effector_position + vector_to_goal
-            # guided_conf = np.array(self.robot.inverse_kinematics(guided_position, goal_orientation))
-            guided_conf = np.array(self.robot.inverse_kinematics(guided_position))
+            random_conf = np.random.uniform(self.robot.lower_limits, self.robot.upper_limits)
+
+            # Stepping from the end-effector by the vector to the goal always lands on the goal, so no link state read is needed
+            # guided_conf = np.array(self.robot.inverse_kinematics(goal_position, goal_orientation))
+            guided_conf = np.array(self.robot.inverse_kinematics(goal_position))
             final_conf = (1 - alpha) * random_conf + alpha * guided_conf
             
             return final_conf
@@ -58,19 +54,11 @@ class PrunerEnv:
         def sample():
             def generate_sample():
                 # Sample a random configuration within joint limits
-                random_conf = np.random.uniform([limit[0] for limit in self.robot.joint_limits], 
-                                                [limit[1] for limit in self.robot.joint_limits])
-                self.robot.set_joint_positions(random_conf)
-                
-                # Get the current end-effector position
-                end_effector_position, _ = self.robot.get_link_state(self.robot.end_effector_index)
-                
-                # Calculate the vector towards the goal position
-                vector_to_goal = np.array(goal_position) - end_effector_position
-                guided_position = end_effector_position + vector_to_goal
+                random_conf = np.random.uniform(self.robot.lower_limits, self.robot.upper_limits)
                 
-                # Perform inverse kinematics to find the configuration for the guided position
-                guided_conf = np.array(self.robot.inverse_kinematics(guided_position))
+                # Perform inverse kinematics to find the configuration for the goal position (the end-effector position
+                # plus the vector towards the goal is the goal itself, so the link state does not need to be read)
+                guided_conf = np.array(self.robot.inverse_kinematics(goal_position))
                 
                 # Blend the random configuration and guided configuration using alpha
                 final_conf = (1 - alpha) * random_conf + alpha * guided_conf
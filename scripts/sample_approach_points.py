@@ -1,6 +1,5 @@
 import pybullet as p
 import numpy as np
-from scipy.spatial.transform import Rotation as R
 
 
 def prune_arc(prune_point, radius, allowance_angle, num_arc_points, y_ori_default=0.0, z_ori_default=0):
@@ -64,14 +63,27 @@ def sample_hemisphere_suface_pts(look_at_point, look_at_point_offset, radius, nu
     angles_from_y = np.arccos(np.abs((coordinates_unique[:, 1] - origin[1]) / radius))
 
     # Filter the coordinates based on the angle threshold
-    filtered_coordinates = coordinates_unique[angles_from_y <= angle_threshold]
+    return coordinates_unique[angles_from_y <= angle_threshold]
 
-    # Extract the filtered x, y, z coordinates
-    x_filtered = filtered_coordinates[:, 0]
-    y_filtered = filtered_coordinates[:, 1]
-    z_filtered = filtered_coordinates[:, 2]
+def hemisphere_traversal_order(center, points):
+    """
+    Order points on a hemisphere so that consecutive points are neighbours, sweeping the elevation angle inside each
+    azimuthal angle and reversing the sweep direction on every other azimuth (serpentine raster).
+
+    Parameters:
+    - center: Tuple or list of 3 coordinates (x, y, z) for the center of the hemisphere.
+    - points: Array of shape (N, 3) of points on the hemisphere surface.
+
+    Returns:
+    - Array of shape (N,) with the indices of points in traversal order.
+    """
+    offsets = points - np.asarray(center, dtype=float)
+    theta = np.arctan2(offsets[:, 1], offsets[:, 0]).round(9)  # Round so points on the same grid azimuth compare equal
+    phi = np.arccos(np.clip(offsets[:, 2] / np.linalg.norm(offsets, axis=1), -1, 1))
 
-    return np.vstack((x_filtered, y_filtered, z_filtered)).T
+    # Rank each point's azimuth on the grid and flip the elevation sweep on odd ranks
+    theta_rank = np.unique(theta, return_inverse=True)[1]
+    return np.lexsort((np.where(theta_rank % 2, -phi, phi), theta_rank))
 
 def hemisphere_orientations(point1, points2):
     """
@@ -85,30 +97,25 @@ def hemisphere_orientations(point1, points2):
     - Array of shape (N, 4) where each row is a quaternion (x, y, z, w) representing the rotation from the z-axis to the line direction.
     """
     # Convert point1 to numpy array
-    point1 = np.array(point1)
+    point1 = np.array(point1, dtype=float)
     
     # Compute the direction vectors for each point in points2
     direction_vectors = point1 - points2  # Subtract points2 from point1 (reverse direction)
-    direction_vectors = direction_vectors / np.linalg.norm(direction_vectors, axis=1)[:, np.newaxis]  # Normalize direction vectors
-    
-    # Define the reference direction (z-axis)
-    reference_direction = np.array([0, 0, 1])
-    
-    quaternions = np.zeros((direction_vectors.shape[0], 4))  # Prepare an array for quaternions
+    direction_vectors /= np.linalg.norm(direction_vectors, axis=1)[:, np.newaxis]  # Normalize direction vectors in place
     
-    # Compute the quaternion for each direction vector
-    for i, direction_vector in enumerate(direction_vectors):
-        rotation = R.align_vectors([direction_vector], [reference_direction])[0]
-
-        # Convert the quaternion to Euler angles (roll, pitch, yaw)
-        euler_angles = rotation.as_euler('xyz')  # Get Euler angles in x-y-z order (roll, pitch, yaw)
-        
-        # Fix the roll angle to maintain the camera being upright
-        euler_angles[1] = 0  # Fix the roll (around y-axis)
-        
-        # Convert the modified Euler angles back to a quaternion
-        fixed_rotation = R.from_euler('xyz', euler_angles)
-
-        quaternions[i] = rotation.as_quat()  # scipy returns in (x, y, z, w) order by default
+    # The shortest rotation from the reference z-axis to each direction has the quaternion (z x d, 1 + z . d) before normalizing,
+    # which is computed for every direction at once. For a unit direction its norm is sqrt(2 * (1 + z . d)), so the quaternion is
+    # scaled directly rather than taking a second norm
+    w = 1 + direction_vectors[:, 2]
+    scale = np.sqrt(2 * np.maximum(w, 1e-12))
+
+    quaternions = np.empty((direction_vectors.shape[0], 4))  # (x, y, z, w) order to match scipy and PyBullet
+    np.divide(-direction_vectors[:, 1], scale, out=quaternions[:, 0])
+    np.divide(direction_vectors[:, 0], scale, out=quaternions[:, 1])
+    quaternions[:, 2] = 0
+    np.divide(w, scale, out=quaternions[:, 3])
+
+    # A direction opposite the z-axis has no unique shortest rotation, use a half turn about the x-axis
+    quaternions[w < 1e-12] = [1, 0, 0, 0]
     
-    return quaternions
\ No newline at end of file
+    return quaternions
@@ -1,5 +1,4 @@
 import numpy as np
-import time
 import sys
 import os
 
@@ -11,16 +10,17 @@ sys.path.append(parent_dir)
 from pyb_utils import PybUtils
 from load_objects import LoadObjects
 from load_robot import LoadRobot
-from sample_approach_points import prune_arc, sample_hemisphere_suface_pts, hemisphere_orientations
+from sample_approach_points import prune_arc, sample_hemisphere_suface_pts, hemisphere_orientations, hemisphere_traversal_order
+from ur5e_ik import ur5e_closest_ik, ur5e_model_matches
 
 
 class AlignHemisphere:
     def __init__(self, robot_urdf_path, robot_home_pos, renders: bool) -> None:
         self.pyb = PybUtils(self, renders=renders)
         self.object_loader = LoadObjects(self.pyb.con)
-        self.robot = LoadRobot(self.pyb.con, robot_urdf_path, [0, 0, 0], self.pyb.con.getQuaternionFromEuler([0, 0, 0]), robot_home_pos)
+        self.robot = LoadRobot(self.pyb.con, robot_urdf_path, [0, 0, 0], (0.0, 0.0, 0.0, 1.0), robot_home_pos)
 
-    def test(self):
+    def test(self, analytic_ik=None):
         # Target position and orientation for the end-effector
         look_at_point = [0.7, 0.7, 0.6]    # Point where the end-effector should face
         # look_at_point = self.object_loader.prune_point_1_pos
@@ -32,63 +32,88 @@ class AlignHemisphere:
         # self.pyb.con.changeVisualShape(look_at_sphere, -1, rgbaColor=[0, 1, 0, 1]) 
 
         hemisphere_pts = sample_hemisphere_suface_pts(look_at_point, look_at_point_offset, 0.25, num_points)
+
+        # Sweep the hemisphere as a serpentine raster so consecutive samples are neighbours, which the warm-started IK
+        # relies on
+        hemisphere_center = np.array(look_at_point) - [0, look_at_point_offset, 0]
+        hemisphere_pts = hemisphere_pts[hemisphere_traversal_order(hemisphere_center, hemisphere_pts)]
+
+        # Drop the samples that lie beyond the robot's reach before spending an IK solve on them
+        reach_origin, max_reach = self.robot.reach_bound()
+        reachable = np.linalg.norm(hemisphere_pts - reach_origin, axis=1) <= max_reach
+        hemisphere_pts = hemisphere_pts[reachable]
+        if len(hemisphere_pts) == 0:
+            print("No hemisphere points are within the robot's reach")
+            return
+
         hemisphere_oris = hemisphere_orientations(look_at_point, hemisphere_pts)
 
-        # Iterate through position and orientation pairs
+        # The closed form solver only models the UR5e of ./urdf/ur5e/ur5e.urdf with an identity base orientation, check
+        # that it reproduces this robot's end-effector pose before trusting it. By default it is used whenever it matches
+        ee_state = self.pyb.con.getLinkState(self.robot.robotId, self.robot.end_effector_index, computeForwardKinematics=True)
+        ur5e_model = ur5e_model_matches(self.robot.get_joint_positions(), np.array(ee_state[4]) - self.robot.start_pos, ee_state[5])
+        if analytic_ik is None:
+            analytic_ik = ur5e_model
+        elif analytic_ik and not ur5e_model:
+            raise ValueError(f"The analytic UR5e IK does not match the kinematics of {self.robot.robot_urdf_path}")
+
+        # Solve the IK of every hemisphere pose and score all of the solutions in batched calls
+        if analytic_ik:
+            # Closed form UR5e solutions closest to the home configuration (the robot base has the identity orientation)
+            best_joint_config = ur5e_closest_ik(hemisphere_pts - self.robot.start_pos, hemisphere_oris, self.robot.home_config)
+
+            # Drop the poses the robot cannot reach exactly
+            solved = ~np.isnan(best_joint_config).any(axis=1)
+            hemisphere_pts = hemisphere_pts[solved]
+            best_joint_config = best_joint_config[solved]
+            if len(hemisphere_pts) == 0:
+                print("No hemisphere poses have an inverse kinematics solution")
+                return
+        else:
+            # Consecutive samples are neighbours on the hemisphere with similar poses, so each solve is seeded with the
+            # previous solution
+            best_joint_config = self.robot.batch_inverse_kinematics(hemisphere_pts, hemisphere_oris, warm_start=True)
+        manips = self.robot.batch_manipulability(best_joint_config, planar=False)
+
+        # Configuration with the highest manipulability
+        best_idx = int(np.argmax(manips))
+
+        # Iterate through position and joint configuration pairs
         iteration = 0
 
-        manips = []
-        best_joint_config = []
-        best_ee_point = []
-
-        # Define sphere parameters
-        radius = 0.01
-        mass = 0
-        collision_shape_id = self.pyb.con.createCollisionShape(shapeType=self.pyb.con.GEOM_SPHERE, radius=0.0001)
-        visual_shape_id = self.pyb.con.createVisualShape(shapeType=self.pyb.con.GEOM_SPHERE, radius=radius)
-
-        max_manipulability = 0
-        best_config = None
-        for target_position, target_orientation in zip(hemisphere_pts, hemisphere_oris):
-            # Add a debug line between the two points
-            line_id = self.pyb.con.addUserDebugLine(lineFromXYZ=target_position,
-                                        lineToXYZ=look_at_point,
-                                        lineColorRGB=[1, 0, 0],  # Red color
-                                        lineWidth=2)
-
-            # Create the sphere body
-            sphere_id = self.pyb.con.createMultiBody(baseMass=mass,
-                                        baseCollisionShapeIndex=collision_shape_id,
-                                        baseVisualShapeIndex=visual_shape_id)
-            self.pyb.con.changeVisualShape(sphere_id, -1, rgbaColor=[1, 1, 1, 1]) 
-            # poi_id = self.pyb.con.loadURDF("sphere2.urdf", target_position, globalScaling=0.041, useFixedBase=True)
-            self.pyb.con.resetBasePositionAndOrientation(sphere_id, target_position, [0, 0, 0, 1])
+        # Markers and debug lines are only useful in the GUI, skip creating them when running headless
+        renders = self.pyb.renders
 
-            joint_angles = self.robot.inverse_kinematics(target_position, target_orientation)
+        if renders:
+            # Define sphere parameters
+            radius = 0.01
+            mass = 0
+            collision_shape_id = self.pyb.con.createCollisionShape(shapeType=self.pyb.con.GEOM_SPHERE, radius=0.0001)
+            visual_shape_id = self.pyb.con.createVisualShape(shapeType=self.pyb.con.GEOM_SPHERE, radius=radius, rgbaColor=[1, 1, 1, 1])
 
-            self.robot.set_joint_positions(joint_angles)
-
-            manipulability = self.robot.calculate_manipulability(joint_angles, planar=False)
+            # Create a sphere body at every hemisphere point in one batched call sharing the same shapes
+            sphere_ids = self.pyb.con.createMultiBody(baseMass=mass,
+                                        baseCollisionShapeIndex=collision_shape_id,
+                                        baseVisualShapeIndex=visual_shape_id,
+                                        batchPositions=hemisphere_pts)
 
-            if manipulability > max_manipulability:
-                best_config = joint_angles
-                self.robot.reset_joint_positions(best_config)
-                self.robot.set_joint_positions(best_config)
+            # Add a debug line between each hemisphere point and the look at point
+            for target_position in hemisphere_pts:
+                line_id = self.pyb.con.addUserDebugLine(lineFromXYZ=target_position,
+                                            lineToXYZ=look_at_point,
+                                            lineColorRGB=[1, 0, 0],  # Red color
+                                            lineWidth=2)
 
-            manips.append(manipulability)
-            best_joint_config.append(joint_angles)
+        for target_position, joint_angles in zip(hemisphere_pts, best_joint_config):
+            self.robot.set_joint_positions(joint_angles)
 
             # print(f"Distance between hemisphere point and target: {np.linalg.norm(target_position - look_at_point)}")
 
-            # Step simulation and render
-            # for _ in range(240):  # Adjust number of simulation steps as needed
-            #     self.pyb.con.stepSimulation()
-            #     time.sleep(1./240.)  # Sleep to match real-time
-
             # # Pause to view the result before moving to the next target
             # input("Press Enter to view the next target...")
 
-            if iteration == 37:
+            # Highlight the hemisphere point of the best configuration
+            if renders and iteration == best_idx:
                 # poi_id = self.pyb.con.loadURDF("sphere2.urdf", target_position, globalScaling=0.05, useFixedBase=True)
                 # self.pyb.con.changeVisualShape(poi_id, -1, rgbaColor=[1, 1, 1, 1]) 
 
@@ -107,9 +132,16 @@ class AlignHemisphere:
 
             iteration += 1
 
+        # Move the robot to the configuration with the highest manipulability
+        best_config = best_joint_config[best_idx]
+        print(f"Highest manipulability found: {np.round(manips[best_idx], 5)} at hemisphere point {best_idx}")
+        self.robot.reset_joint_positions(best_config)
+        self.robot.set_joint_positions(best_config)
 
-        while True:
-            self.pyb.con.stepSimulation()
+        # Keep the GUI open, a headless run has nothing to show so it returns right away
+        if renders:
+            while True:
+                self.pyb.con.stepSimulation()
 
 
 if __name__ == '__main__':
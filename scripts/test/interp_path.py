@@ -14,17 +14,16 @@ def linear_interp_path(end_positions, start_positions, steps=100):
         steps (int, optional): number of interpolated positions. Defaults to 100.
 
     Returns:
-        list: interpolated path
+        np.array: interpolated path, shape (steps, num_joints)
     """
-    interpolated_joint_angles = [np.linspace(start, end, steps) for start, end in zip(start_positions, end_positions)]
-    return [tuple(p) for p in zip(*interpolated_joint_angles)]
+    return np.linspace(start_positions, end_positions, steps)
 
 def test():
     # Start the PyBullet 
     p.connect(p.GUI)
     p.setAdditionalSearchPath(pybullet_data.getDataPath())  # Load default data
     
-    robot_id = p.loadURDF("./urdf/ur5e/ur5e_cart.urdf", [0, 0, 0], p.getQuaternionFromEuler([0, 0, 0]), useFixedBase=True, flags=p.URDF_USE_SELF_COLLISION)
+    robot_id = p.loadURDF("./urdf/ur5e/ur5e_cart.urdf", [0, 0, 0], (0.0, 0.0, 0.0, 1.0), useFixedBase=True, flags=p.URDF_USE_SELF_COLLISION)
 
     num_joints = p.getNumJoints(robot_id)
 
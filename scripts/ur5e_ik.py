@@ -0,0 +1,209 @@
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+
+# Standard DH parameters of the UR5e, taken from the joint origins in ./urdf/ur5e/ur5e.urdf
+# (d4 is the sum of the 0.138, -0.131 and 0.127 shoulder, elbow and wrist offsets)
+UR5E_D = np.array([0.163, 0.0, 0.0, 0.134, 0.1, 0.1])
+UR5E_A = np.array([0.0, -0.425, -0.392, 0.0, 0.0, 0.0])
+UR5E_ALPHA = np.array([np.pi/2, 0.0, 0.0, np.pi/2, -np.pi/2, 0.0])
+
+# The URDF base_link is rotated by pi about z from the DH base frame, and the gripper link sits 0.215 m along the
+# tool0 (DH frame 6) z-axis
+BASE_TO_DH = np.diag([-1.0, -1.0, 1.0, 1.0])
+TOOL_OFFSET = 0.215
+
+
+def dh_transform(theta, d, a, alpha):
+    """ Standard DH transform of every joint angle in theta
+
+    Args:
+        theta (np.array): joint angles, any shape
+        d (float): link offset
+        a (float): link length
+        alpha (float): link twist
+
+    Returns:
+        np.array: homogeneous transforms, shape theta.shape + (4, 4)
+    """
+    ct, st = np.cos(theta), np.sin(theta)
+    ca, sa = np.cos(alpha), np.sin(alpha)
+
+    T = np.zeros(np.shape(theta) + (4, 4))
+    T[..., 0, 0] = ct
+    T[..., 0, 1] = -st * ca
+    T[..., 0, 2] = st * sa
+    T[..., 0, 3] = a * ct
+    T[..., 1, 0] = st
+    T[..., 1, 1] = ct * ca
+    T[..., 1, 2] = -ct * sa
+    T[..., 1, 3] = a * st
+    T[..., 2, 1] = sa
+    T[..., 2, 2] = ca
+    T[..., 2, 3] = d
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def rigid_inverse(T):
+    """ Inverse of homogeneous rigid transforms, using the transpose of the rotation instead of a general inverse
+
+    Args:
+        T (np.array): homogeneous transforms, shape (..., 4, 4)
+
+    Returns:
+        np.array: inverse transforms, shape (..., 4, 4)
+    """
+    R_inv = np.swapaxes(T[..., :3, :3], -1, -2)
+
+    T_inv = np.zeros_like(T)
+    T_inv[..., :3, :3] = R_inv
+    T_inv[..., :3, 3] = -(R_inv @ T[..., :3, 3, np.newaxis])[..., 0]
+    T_inv[..., 3, 3] = 1.0
+    return T_inv
+
+
+def tool_transform():
+    """ Transform from DH frame 6 (tool0) to the gripper link
+    """
+    T = np.eye(4)
+    T[2, 3] = TOOL_OFFSET
+    return T
+
+
+def ur5e_forward_kinematics(joint_configs):
+    """ Gripper link pose of many joint configurations in the robot base_link frame
+
+    Args:
+        joint_configs (np.array): joint configurations, shape (N, 6)
+
+    Returns:
+        np.array: homogeneous transforms, shape (N, 4, 4)
+    """
+    joint_configs = np.asarray(joint_configs, dtype=float)
+
+    T = np.broadcast_to(BASE_TO_DH, joint_configs.shape[:-1] + (4, 4))
+    for i in range(6):
+        T = T @ dh_transform(joint_configs[..., i], UR5E_D[i], UR5E_A[i], UR5E_ALPHA[i])
+    return T @ tool_transform()
+
+
+def ur5e_analytic_ik(targets):
+    """ Closed form inverse kinematics of the UR5e following the standard spherical wrist decomposition. Every target
+    has up to 8 solutions (shoulder left/right, wrist up/down, elbow up/down), branches that cannot reach the target
+    are nan.
+
+    Args:
+        targets (np.array): gripper link poses in the robot base_link frame, shape (N, 4, 4)
+
+    Returns:
+        np.array: joint configurations in (-pi, pi], shape (N, 8, 6)
+    """
+    d1, _, _, d4, d5, d6 = UR5E_D
+    a2, a3 = UR5E_A[1], UR5E_A[2]
+
+    # Express the targets as DH frame 6 poses in the DH base frame
+    T06 = BASE_TO_DH.T @ np.asarray(targets, dtype=float) @ rigid_inverse(tool_transform())
+    N = len(T06)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Shoulder pan from the wrist center, two solutions, shape (N, 2)
+        p05 = T06[:, :3, 3] - d6 * T06[:, :3, 2]
+        psi = np.arctan2(p05[:, 1], p05[:, 0])
+        phi = np.arccos(d4 / np.hypot(p05[:, 0], p05[:, 1]))
+        theta1 = np.stack((psi + phi, psi - phi), axis=1) + np.pi/2
+
+        # Wrist 2 from the tool position, two solutions per shoulder, shape (N, 2, 2)
+        s1, c1 = np.sin(theta1), np.cos(theta1)
+        p06 = T06[:, :3, 3]
+        c5 = (p06[:, np.newaxis, 0] * s1 - p06[:, np.newaxis, 1] * c1 - d4) / d6
+        theta5 = np.arccos(c5)
+        theta5 = np.stack((theta5, -theta5), axis=2)
+
+        # Wrist 3 from the tool axes, any angle is a solution at the wrist singularity (sin(theta5) = 0)
+        T60 = rigid_inverse(T06)
+        sign5 = np.sign(np.sin(theta5))
+        s1, c1 = s1[..., np.newaxis], c1[..., np.newaxis]
+        X60, Y60 = T60[:, np.newaxis, np.newaxis, :, 0], T60[:, np.newaxis, np.newaxis, :, 1]
+        theta6 = np.arctan2(sign5 * (-X60[..., 1] * s1 + Y60[..., 1] * c1),
+                            sign5 * (X60[..., 0] * s1 - Y60[..., 0] * c1))
+
+        # Shoulder lift, elbow and wrist 1 from the planar 2R chain between frames 1 and 4, shape (N, 2, 2, 2)
+        T01 = dh_transform(theta1, d1, 0.0, UR5E_ALPHA[0])[:, :, np.newaxis]
+        T45 = dh_transform(theta5, d5, 0.0, UR5E_ALPHA[4])
+        T56 = dh_transform(theta6, d6, 0.0, UR5E_ALPHA[5])
+        T14 = rigid_inverse(T01) @ T06[:, np.newaxis, np.newaxis] @ rigid_inverse(T45 @ T56)
+        p13 = T14[..., :3, 3] - d4 * T14[..., :3, 1]
+        p13_norm = np.linalg.norm(p13, axis=-1)
+
+        theta3 = np.arccos((p13_norm**2 - a2**2 - a3**2) / (2 * a2 * a3))
+        theta3 = np.stack((theta3, -theta3), axis=3)
+
+        p13_norm = p13_norm[..., np.newaxis]
+        theta2 = (-np.arctan2(p13[..., np.newaxis, 1], -p13[..., np.newaxis, 0])
+                  + np.arcsin(a3 * np.sin(theta3) / p13_norm))
+
+        # Joints 2 to 4 rotate about parallel axes, so the rotation of T14 about z is their summed angle
+        theta234 = np.arctan2(T14[..., 1, 0], T14[..., 0, 0])[..., np.newaxis]
+        theta4 = theta234 - theta2 - theta3
+
+    shape = (N, 2, 2, 2)
+    sols = np.stack((np.broadcast_to(theta1[:, :, np.newaxis, np.newaxis], shape),
+                     theta2,
+                     theta3,
+                     theta4,
+                     np.broadcast_to(theta5[..., np.newaxis], shape),
+                     np.broadcast_to(theta6[..., np.newaxis], shape)), axis=-1).reshape(N, 8, 6)
+
+    # Wrap every joint to (-pi, pi]
+    return np.pi - np.mod(np.pi - sols, 2 * np.pi)
+
+
+def ur5e_closest_ik(positions, orientations, reference_config):
+    """ Analytic inverse kinematics of many gripper poses, keeping the solution branch closest to a reference
+    configuration
+
+    Args:
+        positions (np.array): gripper link positions in the robot base_link frame, shape (N, 3)
+        orientations (np.array): gripper link orientations as quaternions (x, y, z, w), shape (N, 4)
+        reference_config (list): joint configuration the solutions are unwrapped around and compared against
+
+    Returns:
+        np.array: joint configurations, shape (N, 6), nan for the poses with no solution
+    """
+    reference_config = np.asarray(reference_config, dtype=float)
+
+    targets = np.zeros((len(positions), 4, 4))
+    targets[:, :3, :3] = R.from_quat(orientations).as_matrix()
+    targets[:, :3, 3] = positions
+    targets[:, 3, 3] = 1.0
+
+    # Unwrap each branch to the equivalent angles nearest the reference
+    delta = np.mod(ur5e_analytic_ik(targets) - reference_config + np.pi, 2 * np.pi) - np.pi
+    dist = np.linalg.norm(delta, axis=-1)
+
+    # Unreachable branches are nan, push them to the back so they are only chosen when nothing is reachable
+    best_branch = np.argmin(np.where(np.isnan(dist), np.inf, dist), axis=1)
+    return reference_config + delta[np.arange(len(delta)), best_branch]
+
+
+def ur5e_model_matches(joint_config, position, orientation, tol=1e-4):
+    """ Checks that the UR5e model of this module reproduces a robot's gripper pose, so the analytic solutions are only
+    used for the robot they were derived for
+
+    Args:
+        joint_config (list): current joint configuration of the robot
+        position (np.array): current end-effector position in the robot base_link frame
+        orientation (np.array): current end-effector orientation as a quaternion (x, y, z, w) in the robot base_link frame
+        tol (float, optional): position (m) and orientation (rad) tolerance. Defaults to 1e-4.
+
+    Returns:
+        bool: True if the model matches the robot's pose
+    """
+    if len(joint_config) != 6:
+        return False
+
+    T = ur5e_forward_kinematics(np.array([joint_config]))[0]
+    position_error = np.linalg.norm(T[:3, 3] - position)
+    orientation_error = (R.from_matrix(T[:3, :3]).inv() * R.from_quat(orientation)).magnitude()
+    return position_error < tol and orientation_error < tol